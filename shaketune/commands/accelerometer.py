@@ -11,9 +11,10 @@
 
 import os
 import time
-from multiprocessing import Process, Queue
+from multiprocessing import Process
 
-FILE_WRITE_TIMEOUT = 10  # seconds
+FILE_WRITE_TIMEOUT = 10  # seconds without any progress in the file being written
+FILE_WRITE_BUFFER_SIZE = 64 * 1024  # bytes
 
 
 class Accelerometer:
@@ -22,7 +23,6 @@ class Accelerometer:
         self._reactor = reactor
 
         self._bg_client = None
-        self._write_queue = Queue()
         self._write_processes = []
 
     @staticmethod
@@ -41,7 +41,7 @@ class Accelerometer:
         else:
             raise ValueError('measurements already started!')
 
-    def stop_measurement(self, name: str = None, append_time: bool = True):
+    def stop_measurement(self, name: str = None, append_time: bool = True) -> str:
         if self._bg_client is None:
             raise ValueError('measurements need to be started first!')
 
@@ -60,13 +60,13 @@ class Accelerometer:
 
         filename = f'/tmp/shaketune-{name}.csv'
         self._queue_file_write(bg_client, filename)
+        return filename
 
     def _queue_file_write(self, bg_client, filename):
-        self._write_queue.put(filename)
         write_proc = Process(target=self._write_to_file, args=(bg_client, filename))
         write_proc.daemon = True
         write_proc.start()
-        self._write_processes.append(write_proc)
+        self._write_processes.append((write_proc, filename))
 
     def _write_to_file(self, bg_client, filename):
         try:
@@ -74,34 +74,42 @@ class Accelerometer:
         except Exception:
             pass
 
-        with open(filename, 'w') as f:
+        # The lines are formatted on the fly and streamed through a fixed size write buffer
+        # to avoid building the whole CSV content in memory before flushing it to the disk
+        with open(filename, 'w', buffering=FILE_WRITE_BUFFER_SIZE) as f:
             f.write('#time,accel_x,accel_y,accel_z\n')
             samples = bg_client.samples or bg_client.get_samples()
-            for t, accel_x, accel_y, accel_z in samples:
-                f.write(f'{t:.6f},{accel_x:.6f},{accel_y:.6f},{accel_z:.6f}\n')
-
-        self._write_queue.get()
+            f.writelines(
+                f'{t:.6f},{accel_x:.6f},{accel_y:.6f},{accel_z:.6f}\n' for t, accel_x, accel_y, accel_z in samples
+            )
 
     def wait_for_file_writes(self):
-        while not self._write_queue.empty():
-            eventtime = self._reactor.monotonic()
-            self._reactor.pause(eventtime + 0.1)
-
-        for proc in self._write_processes:
-            if proc is None:
-                continue
+        # The timeout is only triggered when a file stops growing: this way the big CSV files (long tests at high
+        # sample rates) can take as long as needed while a stalled write on a slow or full SD card is still caught
+        for proc, filename in self._write_processes:
             eventtime = self._reactor.monotonic()
             endtime = eventtime + FILE_WRITE_TIMEOUT
-            complete = False
-            while eventtime < endtime:
+            last_size = -1
+            while proc.is_alive():
+                if eventtime >= endtime:
+                    raise TimeoutError(
+                        'Shake&Tune was not able to write the accelerometer data into the CSV file. '
+                        'This might be due to a slow SD card or a busy or full filesystem.'
+                    )
                 eventtime = self._reactor.pause(eventtime + 0.05)
-                if not proc.is_alive():
-                    complete = True
-                    break
-            if not complete:
-                raise TimeoutError(
-                    'Shake&Tune was not able to write the accelerometer data into the CSV file. '
-                    'This might be due to a slow SD card or a busy or full filesystem.'
+                try:
+                    size = os.path.getsize(filename)
+                except OSError:
+                    size = -1  # File not created yet
+                if size > last_size:
+                    last_size = size
+                    endtime = eventtime + FILE_WRITE_TIMEOUT
+
+            # A writer process that died before the end (full filesystem, I/O error, etc.) left an incomplete file
+            if proc.exitcode != 0:
+                raise RuntimeError(
+                    f'Shake&Tune failed to write the accelerometer data into {filename} (exit code {proc.exitcode}). '
+                    'This might be due to a full filesystem or a storage error.'
                 )
 
         self._write_processes = []
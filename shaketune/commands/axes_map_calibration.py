@@ -10,6 +10,12 @@
 
 
 from ..helpers.console_output import ConsoleOutput
+from ..helpers.toolhead_helpers import (
+    disabled_input_shaper_scope,
+    get_kinematics_mid_point,
+    get_toolhead_state,
+    velocity_limits_scope,
+)
 from ..shaketune_process import ShakeTuneProcess
 from .accelerometer import Accelerometer
 
@@ -39,68 +45,37 @@ def axes_map_calibration(gcmd, config, st_process: ShakeTuneProcess) -> None:
         )
     accelerometer = Accelerometer(printer.get_reactor(), k_accelerometer)
 
-    toolhead_info = toolhead.get_status(systime)
-    old_accel = toolhead_info['max_accel']
-    old_sqv = toolhead_info['square_corner_velocity']
-
-    # set the wanted acceleration values
-    if 'minimum_cruise_ratio' in toolhead_info:
-        old_mcr = toolhead_info['minimum_cruise_ratio']  # minimum_cruise_ratio found: Klipper >= v0.12.0-239
-        gcode.run_script_from_command(
-            f'SET_VELOCITY_LIMIT ACCEL={accel} MINIMUM_CRUISE_RATIO=0 SQUARE_CORNER_VELOCITY=5.0'
-        )
-    else:  # minimum_cruise_ratio not found: Klipper < v0.12.0-239
-        old_mcr = None
-        gcode.run_script_from_command(f'SET_VELOCITY_LIMIT ACCEL={accel} SQUARE_CORNER_VELOCITY=5.0')
-
-    # Deactivate input shaper if it is active to get raw movements
-    input_shaper = printer.lookup_object('input_shaper', None)
-    if input_shaper is not None:
-        input_shaper.disable_shaping()
-    else:
-        input_shaper = None
-
-    kin_info = toolhead.kin.get_status(systime)
-    mid_x = (kin_info['axis_minimum'].x + kin_info['axis_maximum'].x) / 2
-    mid_y = (kin_info['axis_minimum'].y + kin_info['axis_maximum'].y) / 2
+    toolhead_state = get_toolhead_state(toolhead, systime)
+    mid_x, mid_y = get_kinematics_mid_point(toolhead, systime)
     _, _, _, E = toolhead.get_position()
 
-    # Going to the start position
-    toolhead.move([mid_x - SEGMENT_LENGTH / 2, mid_y - SEGMENT_LENGTH / 2, z_height, E], feedrate_travel)
-    toolhead.dwell(0.5)
-
-    # Start the measurements and do the movements (+X, +Y and then +Z)
-    accelerometer.start_measurement()
-    toolhead.dwell(0.5)
-    toolhead.move([mid_x + SEGMENT_LENGTH / 2, mid_y - SEGMENT_LENGTH / 2, z_height, E], speed)
-    toolhead.dwell(0.5)
-    accelerometer.stop_measurement('axesmap_X', append_time=True)
-    toolhead.dwell(0.5)
-    accelerometer.start_measurement()
-    toolhead.dwell(0.5)
-    toolhead.move([mid_x + SEGMENT_LENGTH / 2, mid_y + SEGMENT_LENGTH / 2, z_height, E], speed)
-    toolhead.dwell(0.5)
-    accelerometer.stop_measurement('axesmap_Y', append_time=True)
-    toolhead.dwell(0.5)
-    accelerometer.start_measurement()
-    toolhead.dwell(0.5)
-    toolhead.move([mid_x + SEGMENT_LENGTH / 2, mid_y + SEGMENT_LENGTH / 2, z_height + SEGMENT_LENGTH, E], speed)
-    toolhead.dwell(0.5)
-    accelerometer.stop_measurement('axesmap_Z', append_time=True)
-
-    accelerometer.wait_for_file_writes()
-
-    # Re-enable the input shaper if it was active
-    if input_shaper is not None:
-        input_shaper.enable_shaping()
-
-    # Restore the previous acceleration values
-    if old_mcr is not None:  # minimum_cruise_ratio found: Klipper >= v0.12.0-239
-        gcode.run_script_from_command(
-            f'SET_VELOCITY_LIMIT ACCEL={old_accel} MINIMUM_CRUISE_RATIO={old_mcr} SQUARE_CORNER_VELOCITY={old_sqv}'
-        )
-    else:  # minimum_cruise_ratio not found: Klipper < v0.12.0-239
-        gcode.run_script_from_command(f'SET_VELOCITY_LIMIT ACCEL={old_accel} SQUARE_CORNER_VELOCITY={old_sqv}')
+    # Set the wanted acceleration values and deactivate input shaper (if active) to get raw movements
+    csv_files = []
+    with velocity_limits_scope(gcode, toolhead_state, accel, 5.0), disabled_input_shaper_scope(printer):
+        # Going to the start position
+        toolhead.move([mid_x - SEGMENT_LENGTH / 2, mid_y - SEGMENT_LENGTH / 2, z_height, E], feedrate_travel)
+        toolhead.dwell(0.5)
+
+        # Start the measurements and do the movements (+X, +Y and then +Z)
+        accelerometer.start_measurement()
+        toolhead.dwell(0.5)
+        toolhead.move([mid_x + SEGMENT_LENGTH / 2, mid_y - SEGMENT_LENGTH / 2, z_height, E], speed)
+        toolhead.dwell(0.5)
+        csv_files.append(accelerometer.stop_measurement('axesmap_X', append_time=True))
+        toolhead.dwell(0.5)
+        accelerometer.start_measurement()
+        toolhead.dwell(0.5)
+        toolhead.move([mid_x + SEGMENT_LENGTH / 2, mid_y + SEGMENT_LENGTH / 2, z_height, E], speed)
+        toolhead.dwell(0.5)
+        csv_files.append(accelerometer.stop_measurement('axesmap_Y', append_time=True))
+        toolhead.dwell(0.5)
+        accelerometer.start_measurement()
+        toolhead.dwell(0.5)
+        toolhead.move([mid_x + SEGMENT_LENGTH / 2, mid_y + SEGMENT_LENGTH / 2, z_height + SEGMENT_LENGTH, E], speed)
+        toolhead.dwell(0.5)
+        csv_files.append(accelerometer.stop_measurement('axesmap_Z', append_time=True))
+
+        accelerometer.wait_for_file_writes()
 
     toolhead.wait_moves()
 
@@ -109,5 +84,6 @@ def axes_map_calibration(gcmd, config, st_process: ShakeTuneProcess) -> None:
     ConsoleOutput.print('This may take some time (1-3min)')
     creator = st_process.get_graph_creator()
     creator.configure(accel, SEGMENT_LENGTH)
+    creator.set_csv_files(csv_files)
     st_process.run()
     st_process.wait_for_completion()
@@ -12,6 +12,12 @@
 from ..helpers.common_func import AXIS_CONFIG
 from ..helpers.console_output import ConsoleOutput
 from ..helpers.resonance_test import vibrate_axis
+from ..helpers.toolhead_helpers import (
+    disabled_input_shaper_scope,
+    get_kinematics_mid_point,
+    get_toolhead_state,
+    velocity_limits_scope,
+)
 from ..shaketune_process import ShakeTuneProcess
 from .accelerometer import Accelerometer
 
@@ -21,7 +27,7 @@ def axes_shaper_calibration(gcmd, config, st_process: ShakeTuneProcess) -> None:
     toolhead = printer.lookup_object('toolhead')
     res_tester = printer.lookup_object('resonance_tester')
     systime = printer.get_reactor().monotonic()
-    toolhead_info = toolhead.get_status(systime)
+    toolhead_state = get_toolhead_state(toolhead, systime)
 
     min_freq = gcmd.get_float('FREQ_START', default=res_tester.test.min_freq, minval=1)
     max_freq = gcmd.get_float('FREQ_END', default=res_tester.test.max_freq, minval=1)
@@ -30,7 +36,7 @@ def axes_shaper_calibration(gcmd, config, st_process: ShakeTuneProcess) -> None:
     axis_input = gcmd.get('AXIS', default='all').lower()
     if axis_input not in {'x', 'y', 'all'}:
         raise gcmd.error('AXIS selection invalid. Should be either x, y, or all!')
-    scv = gcmd.get_float('SCV', default=toolhead_info['square_corner_velocity'], minval=0)
+    scv = gcmd.get_float('SCV', default=toolhead_state.square_corner_velocity, minval=0)
     max_sm = gcmd.get_float('MAX_SMOOTHING', default=None, minval=0)
     feedrate_travel = gcmd.get_float('TRAVEL_SPEED', default=120.0, minval=20.0)
     z_height = gcmd.get_float('Z_HEIGHT', default=None, minval=1)
@@ -56,9 +62,7 @@ def axes_shaper_calibration(gcmd, config, st_process: ShakeTuneProcess) -> None:
             )
         # Use center of bed in case the test point in [resonance_tester] is set to -1,-1,-1
         # This is usefull to get something automatic and is also used in the Klippain modular config
-        kin_info = toolhead.kin.get_status(systime)
-        mid_x = (kin_info['axis_minimum'].x + kin_info['axis_maximum'].x) / 2
-        mid_y = (kin_info['axis_minimum'].y + kin_info['axis_maximum'].y) / 2
+        mid_x, mid_y = get_kinematics_mid_point(toolhead, systime)
         point = (mid_x, mid_y, z_height)
     else:
         x, y, z = test_points[0]
@@ -69,59 +73,45 @@ def axes_shaper_calibration(gcmd, config, st_process: ShakeTuneProcess) -> None:
     toolhead.manual_move(point, feedrate_travel)
     toolhead.dwell(0.5)
 
-    # Configure the graph creator
-    creator = st_process.get_graph_creator()
-    creator.configure(scv, max_sm, accel_per_hz)
-
-    # set the needed acceleration values for the test
-    toolhead_info = toolhead.get_status(systime)
-    old_accel = toolhead_info['max_accel']
-    if 'minimum_cruise_ratio' in toolhead_info:  # minimum_cruise_ratio found: Klipper >= v0.12.0-239
-        old_mcr = toolhead_info['minimum_cruise_ratio']
-        gcode.run_script_from_command(f'SET_VELOCITY_LIMIT ACCEL={max_accel} MINIMUM_CRUISE_RATIO=0')
-    else:  # minimum_cruise_ratio not found: Klipper < v0.12.0-239
-        old_mcr = None
-        gcode.run_script_from_command(f'SET_VELOCITY_LIMIT ACCEL={max_accel}')
-
-    # Deactivate input shaper if it is active to get raw movements
-    input_shaper = printer.lookup_object('input_shaper', None)
-    if input_shaper is not None:
-        input_shaper.disable_shaping()
-    else:
-        input_shaper = None
-
     # Filter axis configurations based on user input, assuming 'axis_input' can be 'x', 'y', 'all' (that means 'x' and 'y')
     filtered_config = [
         a for a in AXIS_CONFIG if a['axis'] == axis_input or (axis_input == 'all' and a['axis'] in ('x', 'y'))
     ]
-    for config in filtered_config:
-        # First we need to find the accelerometer chip suited for the axis
-        accel_chip = Accelerometer.find_axis_accelerometer(printer, config['axis'])
-        if accel_chip is None:
-            raise gcmd.error('No suitable accelerometer found for measurement!')
-        accelerometer = Accelerometer(printer.get_reactor(), printer.lookup_object(accel_chip))
-
-        # Then do the actual measurements
-        accelerometer.start_measurement()
-        vibrate_axis(toolhead, gcode, config['direction'], min_freq, max_freq, hz_per_sec, accel_per_hz)
-        accelerometer.stop_measurement(config['label'], append_time=True)
-
-        accelerometer.wait_for_file_writes()
-
-        # And finally generate the graph for each measured axis
-        ConsoleOutput.print(f'{config["axis"].upper()} axis frequency profile generation...')
-        ConsoleOutput.print('This may take some time (1-3min)')
-        st_process.run()
-        st_process.wait_for_completion()
-        toolhead.dwell(1)
-        toolhead.wait_moves()
-
-    # Re-enable the input shaper if it was active
-    if input_shaper is not None:
-        input_shaper.enable_shaping()
-
-    # Restore the previous acceleration values
-    if old_mcr is not None:  # minimum_cruise_ratio found: Klipper >= v0.12.0-239
-        gcode.run_script_from_command(f'SET_VELOCITY_LIMIT ACCEL={old_accel} MINIMUM_CRUISE_RATIO={old_mcr}')
-    else:  # minimum_cruise_ratio not found: Klipper < v0.12.0-239
-        gcode.run_script_from_command(f'SET_VELOCITY_LIMIT ACCEL={old_accel}')
+
+    # Configure the graph creator
+    creator = st_process.get_graph_creator()
+    creator.configure(scv, max_sm, accel_per_hz, len(filtered_config))
+    st_process.scale_timeout(len(filtered_config))
+
+    # Set the needed acceleration values for the test and deactivate input shaper (if active) to get raw movements
+    with velocity_limits_scope(gcode, toolhead_state, max_accel), disabled_input_shaper_scope(printer):
+        accelerometers = []
+        csv_files = []
+        for config in filtered_config:
+            # First we need to find the accelerometer chip suited for the axis
+            accel_chip = Accelerometer.find_axis_accelerometer(printer, config['axis'])
+            if accel_chip is None:
+                raise gcmd.error('No suitable accelerometer found for measurement!')
+            accelerometer = Accelerometer(printer.get_reactor(), printer.lookup_object(accel_chip))
+
+            # Then do the actual measurements
+            accelerometer.start_measurement()
+            vibrate_axis(toolhead, gcode, config['direction'], min_freq, max_freq, hz_per_sec, accel_per_hz)
+            csv_files.append(accelerometer.stop_measurement(config['label'], append_time=True))
+            accelerometers.append(accelerometer)
+
+            toolhead.dwell(1)
+            toolhead.wait_moves()
+
+        # The CSV files are written in the background while the next axis is measured,
+        # so we only need to wait for all of them to be fully written at the very end
+        for accelerometer in accelerometers:
+            accelerometer.wait_for_file_writes()
+
+    # And finally generate the graphs for all the measured axes at once
+    creator.set_csv_files(csv_files)
+    axes_label = ' and '.join(a['axis'].upper() for a in filtered_config)
+    ConsoleOutput.print(f'{axes_label} axis frequency profile generation...')
+    ConsoleOutput.print('This may take some time (1-3min)')
+    st_process.run()
+    st_process.wait_for_completion()
@@ -13,6 +13,12 @@ from ..helpers.common_func import AXIS_CONFIG
 from ..helpers.console_output import ConsoleOutput
 from ..helpers.motors_config_parser import MotorsConfigParser
 from ..helpers.resonance_test import vibrate_axis
+from ..helpers.toolhead_helpers import (
+    disabled_input_shaper_scope,
+    get_kinematics_mid_point,
+    get_toolhead_state,
+    velocity_limits_scope,
+)
 from ..shaketune_process import ShakeTuneProcess
 from .accelerometer import Accelerometer
 
@@ -73,9 +79,7 @@ def compare_belts_responses(gcmd, config, st_process: ShakeTuneProcess) -> None:
             )
         # Use center of bed in case the test point in [resonance_tester] is set to -1,-1,-1
         # This is usefull to get something automatic and is also used in the Klippain modular config
-        kin_info = toolhead.kin.get_status(systime)
-        mid_x = (kin_info['axis_minimum'].x + kin_info['axis_maximum'].x) / 2
-        mid_y = (kin_info['axis_minimum'].y + kin_info['axis_maximum'].y) / 2
+        mid_x, mid_y = get_kinematics_mid_point(toolhead, systime)
         point = (mid_x, mid_y, z_height)
     else:
         x, y, z = test_points[0]
@@ -86,42 +90,21 @@ def compare_belts_responses(gcmd, config, st_process: ShakeTuneProcess) -> None:
     toolhead.manual_move(point, feedrate_travel)
     toolhead.dwell(0.5)
 
-    # set the needed acceleration values for the test
-    toolhead_info = toolhead.get_status(systime)
-    old_accel = toolhead_info['max_accel']
-    if 'minimum_cruise_ratio' in toolhead_info:  # minimum_cruise_ratio found: Klipper >= v0.12.0-239
-        old_mcr = toolhead_info['minimum_cruise_ratio']
-        gcode.run_script_from_command(f'SET_VELOCITY_LIMIT ACCEL={max_accel} MINIMUM_CRUISE_RATIO=0')
-    else:  # minimum_cruise_ratio not found: Klipper < v0.12.0-239
-        old_mcr = None
-        gcode.run_script_from_command(f'SET_VELOCITY_LIMIT ACCEL={max_accel}')
-
-    # Deactivate input shaper if it is active to get raw movements
-    input_shaper = printer.lookup_object('input_shaper', None)
-    if input_shaper is not None:
-        input_shaper.disable_shaping()
-    else:
-        input_shaper = None
-
-    # Run the test for each axis
-    for config in filtered_config:
-        accelerometer.start_measurement()
-        vibrate_axis(toolhead, gcode, config['direction'], min_freq, max_freq, hz_per_sec, accel_per_hz)
-        accelerometer.stop_measurement(config['label'], append_time=True)
-
-    accelerometer.wait_for_file_writes()
+    toolhead_state = get_toolhead_state(toolhead, systime)
 
-    # Re-enable the input shaper if it was active
-    if input_shaper is not None:
-        input_shaper.enable_shaping()
+    # Set the needed acceleration values for the test and deactivate input shaper (if active) to get raw movements
+    with velocity_limits_scope(gcode, toolhead_state, max_accel), disabled_input_shaper_scope(printer):
+        # Run the test for each axis
+        csv_files = []
+        for config in filtered_config:
+            accelerometer.start_measurement()
+            vibrate_axis(toolhead, gcode, config['direction'], min_freq, max_freq, hz_per_sec, accel_per_hz)
+            csv_files.append(accelerometer.stop_measurement(config['label'], append_time=True))
 
-    # Restore the previous acceleration values
-    if old_mcr is not None:  # minimum_cruise_ratio found: Klipper >= v0.12.0-239
-        gcode.run_script_from_command(f'SET_VELOCITY_LIMIT ACCEL={old_accel} MINIMUM_CRUISE_RATIO={old_mcr}')
-    else:  # minimum_cruise_ratio not found: Klipper < v0.12.0-239
-        gcode.run_script_from_command(f'SET_VELOCITY_LIMIT ACCEL={old_accel}')
+        accelerometer.wait_for_file_writes()
 
     # Run post-processing
+    creator.set_csv_files(csv_files)
     ConsoleOutput.print('Belts comparative frequency profile generation...')
     ConsoleOutput.print('This may take some time (1-3min)')
     st_process.run()
@@ -11,6 +11,7 @@
 from ..helpers.common_func import AXIS_CONFIG
 from ..helpers.console_output import ConsoleOutput
 from ..helpers.resonance_test import vibrate_axis_at_static_freq
+from ..helpers.toolhead_helpers import disabled_input_shaper_scope, get_kinematics_mid_point
 from ..shaketune_process import ShakeTuneProcess
 from .accelerometer import Accelerometer
 
@@ -65,9 +66,7 @@ def excitate_axis_at_freq(gcmd, config, st_process: ShakeTuneProcess) -> None:
             )
         # Use center of bed in case the test point in [resonance_tester] is set to -1,-1,-1
         # This is usefull to get something automatic and is also used in the Klippain modular config
-        kin_info = toolhead.kin.get_status(systime)
-        mid_x = (kin_info['axis_minimum'].x + kin_info['axis_maximum'].x) / 2
-        mid_y = (kin_info['axis_minimum'].y + kin_info['axis_maximum'].y) / 2
+        mid_x, mid_y = get_kinematics_mid_point(toolhead, systime)
         point = (mid_x, mid_y, z_height)
     else:
         x, y, z = test_points[0]
@@ -79,30 +78,22 @@ def excitate_axis_at_freq(gcmd, config, st_process: ShakeTuneProcess) -> None:
     toolhead.dwell(0.5)
 
     # Deactivate input shaper if it is active to get raw movements
-    input_shaper = printer.lookup_object('input_shaper', None)
-    if input_shaper is not None:
-        input_shaper.disable_shaping()
-    else:
-        input_shaper = None
-
-    # If the user want to create a graph, we start accelerometer recording
-    if create_graph:
-        accelerometer.start_measurement()
-
-    toolhead.dwell(0.5)
-    vibrate_axis_at_static_freq(toolhead, gcode, axis_config['direction'], freq, duration, accel_per_hz)
-    toolhead.dwell(0.5)
+    with disabled_input_shaper_scope(printer):
+        # If the user want to create a graph, we start accelerometer recording
+        if create_graph:
+            accelerometer.start_measurement()
 
-    # Re-enable the input shaper if it was active
-    if input_shaper is not None:
-        input_shaper.enable_shaping()
+        toolhead.dwell(0.5)
+        vibrate_axis_at_static_freq(toolhead, gcode, axis_config['direction'], freq, duration, accel_per_hz)
+        toolhead.dwell(0.5)
 
     # If the user wanted to create a graph, we stop the recording and generate it
     if create_graph:
-        accelerometer.stop_measurement(f'staticfreq_{axis.upper()}', append_time=True)
+        csv_file = accelerometer.stop_measurement(f'staticfreq_{axis.upper()}', append_time=True)
         accelerometer.wait_for_file_writes()
 
         creator = st_process.get_graph_creator()
         creator.configure(freq, duration, accel_per_hz)
+        creator.set_csv_files([csv_file])
         st_process.run()
         st_process.wait_for_completion()
@@ -7,6 +7,12 @@
 # Description: Imports various graph creator classes for the Shake&Tune package.
 
 
+import matplotlib
+
+# Select the non-interactive Agg backend once for all the graph creators before pyplot gets
+# imported to avoid any backend probing (Agg is the fastest renderer to generate PNG files)
+matplotlib.use('Agg')
+
 from .axes_map_graph_creator import AxesMapGraphCreator as AxesMapGraphCreator
 from .belts_graph_creator import BeltsGraphCreator as BeltsGraphCreator
 from .graph_creator import GraphCreator as GraphCreator
@@ -20,8 +20,7 @@ import matplotlib.ticker
 import numpy as np
 import pywt
 from scipy import stats
-
-matplotlib.use('Agg')
+from scipy.integrate import cumulative_trapezoid
 
 from ..helpers.common_func import parse_log
 from ..helpers.console_output import ConsoleOutput
@@ -66,12 +65,7 @@ class AxesMapGraphCreator(GraphCreator):
         files = sorted(self._folder.glob('*.png'), key=lambda f: f.stat().st_mtime, reverse=True)
         if len(files) <= keep_results:
             return  # No need to delete any files
-        for old_file in files[keep_results:]:
-            file_date = '_'.join(old_file.stem.split('_')[1:3])
-            for suffix in {'X', 'Y', 'Z'}:
-                csv_file = self._folder / f'axesmap_{file_date}_{suffix}.csv'
-                csv_file.unlink(missing_ok=True)
-            old_file.unlink()
+        self._remove_old_results(files[keep_results:])
 
 
 ######################################################################
@@ -90,8 +84,10 @@ def wavelet_denoise(data: np.ndarray, wavelet: str = 'db1', level: int = 1) -> T
     return denoised_data, noise
 
 
+# Cumulative trapezoidal integration: each partial integral reuses the previous one instead of integrating
+# again the whole [0, i] range for every sample, which was O(n²) and very slow on the longer CSV files
 def integrate_trapz(accel: np.ndarray, time: np.ndarray) -> np.ndarray:
-    return np.array([np.trapz(accel[:i], time[:i]) for i in range(2, len(time) + 1)])
+    return cumulative_trapezoid(accel[: len(time)], time)
 
 
 def process_acceleration_data(
@@ -21,8 +21,6 @@ import matplotlib.ticker
 import numpy as np
 from scipy.stats import pearsonr
 
-matplotlib.use('Agg')
-
 from ..helpers.common_func import detect_peaks, parse_log, setup_klipper_import
 from ..helpers.console_output import ConsoleOutput
 from ..shaketune_config import ShakeTuneConfig
@@ -90,12 +88,7 @@ class BeltsGraphCreator(GraphCreator):
         files = sorted(self._folder.glob('*.png'), key=lambda f: f.stat().st_mtime, reverse=True)
         if len(files) <= keep_results:
             return  # No need to delete any files
-        for old_file in files[keep_results:]:
-            file_date = '_'.join(old_file.stem.split('_')[1:3])
-            for suffix in {'A', 'B'}:
-                csv_file = self._folder / f'beltscomparison_{file_date}_{suffix}.csv'
-                csv_file.unlink(missing_ok=True)
-            old_file.unlink()
+        self._remove_old_results(files[keep_results:])
 
 
 ######################################################################
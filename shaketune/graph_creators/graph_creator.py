@@ -11,15 +11,22 @@
 
 
 import abc
+import gzip
+import os
 import shutil
 from datetime import datetime
 from pathlib import Path
 from typing import Callable, List, Optional
 
+import matplotlib
 from matplotlib.figure import Figure
 
+from ..helpers.console_output import ConsoleOutput
 from ..shaketune_config import ShakeTuneConfig
 
+# Render the long line plots in chunks to keep the Agg renderer fast and within its memory limits
+matplotlib.rcParams['agg.path.chunksize'] = 10000
+
 
 class GraphCreator(abc.ABC):
     def __init__(self, config: ShakeTuneConfig, graph_type: str):
@@ -28,6 +35,15 @@ class GraphCreator(abc.ABC):
         self._version = ShakeTuneConfig.get_git_version()
         self._type = graph_type
         self._folder = self._config.get_results_folder(graph_type)
+        # Common prefix of all the files (CSV, PNG, archives) generated by this graph creator
+        self._files_prefix = f'{graph_type.replace(" ", "")}_{self._graph_date}'
+        self._csv_files: Optional[List[Path]] = None
+        self._pending_files: List[Path] = []
+
+    # Give the exact CSV files written by the measurements (in the measurement order) to
+    # avoid having to find them back by scanning and sorting the whole /tmp folder
+    def set_csv_files(self, csv_files: List[str]) -> None:
+        self._csv_files = [Path(csv_file) for csv_file in csv_files]
 
     def _move_and_prepare_files(
         self,
@@ -36,42 +52,76 @@ class GraphCreator(abc.ABC):
         custom_name_func: Optional[Callable[[Path], str]] = None,
     ) -> List[Path]:
         tmp_path = Path('/tmp')
-        globbed_files = list(tmp_path.glob(glob_pattern))
+        if self._csv_files is not None:
+            csv_files = self._csv_files
+        else:
+            # Fallback when the CSV files are not known: use the most recent ones matching the pattern
+            csv_files = sorted(tmp_path.glob(glob_pattern), key=lambda f: f.stat().st_mtime, reverse=True)
 
-        # If min_files_required is not set, use the number of globbed files as the minimum
-        min_files_required = min_files_required or len(globbed_files)
+        # If min_files_required is not set, use the number of CSV files as the minimum
+        min_files_required = min_files_required or len(csv_files)
 
-        if not globbed_files:
+        if not csv_files:
             raise FileNotFoundError(f'no CSV files found in the /tmp folder to create the {self._type} graphs!')
-        if len(globbed_files) < min_files_required:
+        if len(csv_files) < min_files_required:
             raise FileNotFoundError(f'{min_files_required} CSV files are needed to create the {self._type} graphs!')
 
+        # The raw CSV files are never copied to the results folder (usually on the SD card) as they are only
+        # read and then deleted or archived: they are simply renamed in place in the /tmp folder instead
+        selected_files = csv_files[:min_files_required]
         lognames = []
-        for filename in sorted(globbed_files, key=lambda f: f.stat().st_mtime, reverse=True)[:min_files_required]:
+        for filename in selected_files:
             custom_name = custom_name_func(filename) if custom_name_func else filename.name
-            new_file = self._folder / f"{self._type.replace(' ', '')}_{self._graph_date}_{custom_name}.csv"
-            # shutil.move() is needed to move the file across filesystems (mainly for BTT CB1 Pi default OS image)
-            shutil.move(filename, new_file)
-            lognames.append(new_file)
+            logname = tmp_path / f'{self._files_prefix}_{custom_name}.csv'
+            filename.rename(logname)
+            lognames.append(logname)
+        self._pending_files.extend(lognames)
         return lognames
 
     def _save_figure_and_cleanup(self, fig: Figure, lognames: List[Path], axis_label: Optional[str] = None) -> None:
         axis_suffix = f'_{axis_label}' if axis_label else ''
-        png_filename = self._folder / f"{self._type.replace(' ', '')}_{self._graph_date}{axis_suffix}.png"
+        png_filename = self._folder / f'{self._files_prefix}{axis_suffix}.png'
         fig.savefig(png_filename, dpi=self._config.dpi)
 
         if self._config.keep_csv:
             self._archive_files(lognames)
         else:
             self._remove_files(lognames)
+        self._pending_files = [f for f in self._pending_files if f not in lognames]
+
+    # When the graph creation failed or timed out, the renamed CSV files would be left stranded in /tmp (using
+    # RAM on tmpfs) under a name that is never looked for again: they are archived in the results folder instead,
+    # even if the raw CSV files are not usually kept, so that the measured data is not lost and can be reprocessed
+    def archive_pending_files(self) -> None:
+        pending_files = [f for f in self._pending_files if f.exists()]
+        self._pending_files = []
+        if pending_files:
+            self._archive_files(pending_files)
+            ConsoleOutput.print(f'The raw data of the failed {self._type} graphs was saved in {self._folder}')
 
     def _archive_files(self, lognames: List[Path]) -> None:
-        return
+        # The raw CSV files are mostly ASCII floats that compress very well, so they are gzipped directly from
+        # the /tmp folder into the results folder using the fastest compression level to save some space on
+        # the SD card and write as little as possible to it without spending much CPU time
+        for csv_file in lognames:
+            gz_path = self._folder / f'{csv_file.name}.gz'
+            with open(csv_file, 'rb') as f_in, gzip.open(gz_path, 'wb', compresslevel=1) as f_out:
+                shutil.copyfileobj(f_in, f_out)
+            csv_file.unlink()
 
     def _remove_files(self, lognames: List[Path]) -> None:
         for csv in lognames:
             csv.unlink(missing_ok=True)
 
+    def _remove_old_results(self, old_files: List[Path]) -> None:
+        # All the files of a result (PNG graph, raw CSV files or archive) share the same name prefix, so they
+        # are all removed in a single pass over the folder instead of trying to delete every possible file name
+        prefixes = tuple(old_file.stem for old_file in old_files)
+        with os.scandir(self._folder) as entries:
+            for entry in entries:
+                if entry.name.startswith(prefixes) and entry.is_file():
+                    os.unlink(entry.path)
+
     def get_type(self) -> str:
         return self._type
 
@@ -19,10 +19,13 @@
 # Copyright (C) 2020  Kevin O'Connor <kevin@koconnor.net>
 # Highly modified and improved by Frix_x#0161 #
 
+import multiprocessing
 import optparse
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import List, Optional
+from pathlib import Path
+from typing import List, Optional, Tuple
 
 import matplotlib
 import matplotlib.font_manager
@@ -30,9 +33,8 @@ import matplotlib.pyplot as plt
 import matplotlib.ticker
 import numpy as np
 
-matplotlib.use('Agg')
-
 from ..helpers.common_func import (
+    MAX_PROCESSING_WORKERS,
     compute_mechanical_parameters,
     compute_spectrogram,
     detect_peaks,
@@ -63,41 +65,87 @@ class ShaperGraphCreator(GraphCreator):
         self._max_smoothing: Optional[float] = None
         self._scv: Optional[float] = None
         self._accel_per_hz: Optional[float] = None
+        self._nb_axes: int = 1
 
     def configure(
-        self, scv: float, max_smoothing: Optional[float] = None, accel_per_hz: Optional[float] = None
+        self,
+        scv: float,
+        max_smoothing: Optional[float] = None,
+        accel_per_hz: Optional[float] = None,
+        nb_axes: int = 1,
     ) -> None:
         self._scv = scv
         self._max_smoothing = max_smoothing
         self._accel_per_hz = accel_per_hz
+        self._nb_axes = nb_axes
 
     def create_graph(self) -> None:
         if not self._scv:
             raise ValueError('scv must be set to create the input shaper graph!')
 
+        # All the measured axes are processed at once in the same process (one graph per axis)
         lognames = self._move_and_prepare_files(
             glob_pattern='shaketune-axis_*.csv',
-            min_files_required=1,
+            min_files_required=self._nb_axes,
             custom_name_func=lambda f: f.stem.split('_')[1].upper(),
         )
+        lognames = sorted(lognames)
+
+        # A single axis is directly processed here as there is nothing to gain from a worker process
+        if len(lognames) == 1:
+            self._create_axis_graph(lognames[0])
+            return
+
+        # Each axis graph is independent and CPU bound, so they are all rendered in parallel in forked worker processes
+        # (to inherit the Klipper shaper_calibrate module and the reduced process priority). Their console output is
+        # collected and printed afterward axis by axis to not interleave the results of the different axes
+        with ProcessPoolExecutor(
+            max_workers=min(MAX_PROCESSING_WORKERS, len(lognames)), mp_context=multiprocessing.get_context('fork')
+        ) as executor:
+            axes_results = list(executor.map(self._create_buffered_axis_graph, lognames))
+
+        # The output of every axis is printed, even if the other one failed, before raising the first error
+        errors = []
+        for axis_output, error in axes_results:
+            for message in axis_output:
+                ConsoleOutput.print(message, end='')
+            if error is not None:
+                errors.append(error)
+        for error in errors[1:]:
+            ConsoleOutput.print(f'Error while generating the graphs: {error}')
+        if errors:
+            raise errors[0]
+
+    def _create_axis_graph(self, logname: Path) -> None:
+        axis_label = logname.stem.split('_')[-1]
+        ConsoleOutput.print(f'{axis_label} axis:')
         fig = shaper_calibration(
-            lognames=[str(path) for path in lognames],
+            lognames=[str(logname)],
             klipperdir=str(self._config.klipper_folder),
             max_smoothing=self._max_smoothing,
             scv=self._scv,
             accel_per_hz=self._accel_per_hz,
             st_version=self._version,
         )
-        self._save_figure_and_cleanup(fig, lognames, lognames[0].stem.split('_')[-1])
+        self._save_figure_and_cleanup(fig, [logname], axis_label)
+        plt.close(fig)
+
+    # Used in the worker processes to collect the console output of an axis and return it along with the error that
+    # may have been raised (instead of raising it) to not lose the output that was already generated for this axis
+    def _create_buffered_axis_graph(self, logname: Path) -> Tuple[List[str], Optional[Exception]]:
+        axis_output = []
+        ConsoleOutput.register_output_callback(axis_output.append)
+        try:
+            self._create_axis_graph(logname)
+        except Exception as err:
+            return axis_output, err
+        return axis_output, None
 
     def clean_old_files(self, keep_results: int = 3) -> None:
         files = sorted(self._folder.glob('*.png'), key=lambda f: f.stat().st_mtime, reverse=True)
         if len(files) <= 2 * keep_results:
             return  # No need to delete any files
-        for old_file in files[2 * keep_results :]:
-            csv_file = old_file.with_suffix('.csv')
-            csv_file.unlink(missing_ok=True)
-            old_file.unlink()
+        self._remove_old_results(files[2 * keep_results :])
 
 
 ######################################################################
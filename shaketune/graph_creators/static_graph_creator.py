@@ -19,8 +19,6 @@ import matplotlib.pyplot as plt
 import matplotlib.ticker
 import numpy as np
 
-matplotlib.use('Agg')
-
 from ..helpers.common_func import compute_spectrogram, parse_log
 from ..helpers.console_output import ConsoleOutput
 from ..shaketune_config import ShakeTuneConfig
@@ -76,10 +74,7 @@ class StaticGraphCreator(GraphCreator):
         files = sorted(self._folder.glob('*.png'), key=lambda f: f.stat().st_mtime, reverse=True)
         if len(files) <= keep_results:
             return  # No need to delete any files
-        for old_file in files[keep_results:]:
-            csv_file = old_file.with_suffix('.csv')
-            csv_file.unlink(missing_ok=True)
-            old_file.unlink()
+        self._remove_old_results(files[keep_results:])
 
 
 ######################################################################
@@ -9,11 +9,13 @@
 
 
 import math
+import multiprocessing
 import optparse
 import os
 import re
 import tarfile
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import List, Optional, Tuple
@@ -25,9 +27,8 @@ import matplotlib.pyplot as plt
 import matplotlib.ticker
 import numpy as np
 
-matplotlib.use('Agg')
-
 from ..helpers.common_func import (
+    MAX_PROCESSING_WORKERS,
     compute_mechanical_parameters,
     detect_peaks,
     identify_low_energy_zones,
@@ -68,8 +69,8 @@ class VibrationsGraphCreator(GraphCreator):
         self._motors: List[Motor] = motor_config_parser.get_motors()
 
     def _archive_files(self, lognames: List[Path]) -> None:
-        tar_path = self._folder / f'{self._type}_{self._graph_date}.tar.gz'
-        with tarfile.open(tar_path, 'w:gz') as tar:
+        tar_path = self._folder / f'{self._files_prefix}.tar.gz'
+        with tarfile.open(tar_path, 'w:gz', compresslevel=1) as tar:
             for csv_file in lognames:
                 tar.add(csv_file, arcname=csv_file.name, recursive=False)
                 csv_file.unlink()
@@ -97,10 +98,7 @@ class VibrationsGraphCreator(GraphCreator):
         files = sorted(self._folder.glob('*.png'), key=lambda f: f.stat().st_mtime, reverse=True)
         if len(files) <= keep_results:
             return  # No need to delete any files
-        for old_file in files[keep_results:]:
-            old_file.unlink()
-            tar_file = old_file.with_suffix('.tar.gz')
-            tar_file.unlink(missing_ok=True)
+        self._remove_old_results(files[keep_results:])
 
 
 ######################################################################
@@ -114,6 +112,17 @@ def calc_freq_response(data) -> Tuple[np.ndarray, np.ndarray]:
     return helper.process_accelerometer_data(data)
 
 
+# Parse a CSV file and compute its PSD. This is a top level function to be usable
+# from the worker processes that are processing all the CSV files in parallel
+def compute_log_psd(logname: str) -> Optional[Tuple[float, float, np.ndarray, np.ndarray]]:
+    data = parse_log(logname)
+    if data is None:
+        return None  # File is not in the expected format, skip it
+    angle, speed = extract_angle_and_speed(logname)
+    freq_response = calc_freq_response(data)
+    return angle, speed, freq_response.freq_bins, freq_response.psd_sum
+
+
 # Calculate motor frequency profiles based on the measured Power Spectral Density (PSD) measurements for the machine kinematics
 # main angles and then create a global motor profile as a weighted average (from their own vibrations) of all calculated profiles
 def compute_motor_profiles(
@@ -742,14 +751,21 @@ def vibrations_profile(
     psds_sum = defaultdict(lambda: defaultdict(list))
     target_freqs_initialized = False
 
-    for logname in lognames:
-        data = parse_log(logname)
-        if data is None:
-            continue  # File is not in the expected format, skip it
-        angle, speed = extract_angle_and_speed(logname)
-        freq_response = calc_freq_response(data)
-        first_freqs = freq_response.freq_bins
-        psd_sum = freq_response.psd_sum
+    # The CSV files are all independent and their processing is CPU bound, so it is spread over multiple worker
+    # processes. They are forked to inherit the Klipper shaper_calibrate module and the reduced process priority.
+    # With a single worker available (small boards), they are directly processed here to avoid the pickling overhead
+    if MAX_PROCESSING_WORKERS == 1:
+        log_psds = list(map(compute_log_psd, lognames))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=MAX_PROCESSING_WORKERS, mp_context=multiprocessing.get_context('fork')
+        ) as executor:
+            log_psds = list(executor.map(compute_log_psd, lognames))
+
+    for log_psd in log_psds:
+        if log_psd is None:
+            continue
+        angle, speed, first_freqs, psd_sum = log_psd
 
         if not target_freqs_initialized:
             target_freqs = first_freqs[first_freqs <= max_freq]
@@ -8,6 +8,7 @@
 #              package for 3D printer vibration analysis and diagnostics.
 
 
+import gzip
 import math
 import os
 import sys
@@ -19,6 +20,10 @@ from scipy.signal import spectrogram
 
 from .console_output import ConsoleOutput
 
+# Number of worker processes used to process the CSV files in parallel during the graphs creation.
+# One CPU core is always left for Klipper to avoid slowing it down on the small SBCs with few cores
+MAX_PROCESSING_WORKERS = max(1, min(4, (os.cpu_count() or 1) - 1))
+
 # Constant used to define the standard axis direction and names
 AXIS_CONFIG = [
     {'axis': 'x', 'direction': (1, 0, 0), 'label': 'axis_X'},
@@ -32,7 +37,9 @@ AXIS_CONFIG = [
 
 def parse_log(logname):
     try:
-        with open(logname) as f:
+        # Archived CSV files are gzipped and need to be decompressed on the fly
+        open_func = gzip.open if str(logname).endswith('.gz') else open
+        with open_func(logname, 'rt') as f:
             header = None
             for line in f:
                 cleaned_line = line.strip()
@@ -58,8 +65,9 @@ def parse_log(logname):
                 )
                 return None
 
-            # If we have the correct raw data header, proceed to load the data
-            data = np.loadtxt(logname, comments='#', delimiter=',', skiprows=1)
+            # If we have the correct raw data header, proceed to load the data directly from the already
+            # opened file (that is positioned just after the header) to avoid reading it a second time
+            data = np.loadtxt(f, comments='#', delimiter=',')
             if data.ndim == 1 or data.shape[1] != 4:
                 ConsoleOutput.print(
                     f'Warning: {logname} does not have the correct data format; expected 4 columns. '
@@ -108,14 +116,17 @@ def compute_spectrogram(data):
     Fs = N / (data[-1, 0] - data[0, 0])
     # Round up to a power of 2 for faster FFT
     M = 1 << int(0.5 * Fs - 1).bit_length()
-    window = np.kaiser(M, 6.0)
+    # The spectrogram is only used for display, so the accelerometer signals (already noisy) are processed
+    # in single precision to halve the memory traffic and use the faster float32 FFTs. The time column is
+    # kept untouched in float64 as its absolute values would lose too much precision in float32
+    window = np.kaiser(M, 6.0).astype(np.float32)
 
     def _specgram(x):
         return spectrogram(
             x, fs=Fs, window=window, nperseg=M, noverlap=M // 2, detrend='constant', scaling='density', mode='psd'
         )
 
-    d = {'x': data[:, 1], 'y': data[:, 2], 'z': data[:, 3]}
+    d = {axis: data[:, col].astype(np.float32) for col, axis in enumerate('xyz', start=1)}
     f, t, pdata = _specgram(d['x'])
     for axis in 'yz':
         pdata += _specgram(d[axis])[2]
@@ -0,0 +1,75 @@
+# Shake&Tune: 3D printer analysis tools
+#
+# Copyright (C) 2024 Félix Boisselier <felix@fboisselier.fr> (Frix_x on Discord)
+# Licensed under the GNU General Public License v3.0 (GPL-3.0)
+#
+# File: toolhead_helpers.py
+# Description: Contains helper functions used by the Shake&Tune commands to query the toolhead
+#              and kinematics state from Klipper and to temporarily change the toolhead
+#              velocity limits and the input shaper state during the tests.
+
+
+from contextlib import contextmanager
+from typing import NamedTuple, Optional, Tuple
+
+
+class ToolheadState(NamedTuple):
+    max_accel: float
+    square_corner_velocity: float
+    minimum_cruise_ratio: Optional[float]  # None if not found: Klipper < v0.12.0-239
+
+
+# Query the toolhead status only once per command and keep the
+# needed values in a lightweight tuple to be reused all along the test
+def get_toolhead_state(toolhead, systime) -> ToolheadState:
+    toolhead_info = toolhead.get_status(systime)
+    return ToolheadState(
+        max_accel=toolhead_info['max_accel'],
+        square_corner_velocity=toolhead_info['square_corner_velocity'],
+        minimum_cruise_ratio=toolhead_info.get('minimum_cruise_ratio', None),
+    )
+
+
+# Get the center of the bed from the kinematics limits. This is kept separate from the toolhead state
+# as it should only be queried by the commands that really need it (ie. when no test point is set)
+def get_kinematics_mid_point(toolhead, systime) -> Tuple[float, float]:
+    kin_info = toolhead.kin.get_status(systime)
+    mid_x = (kin_info['axis_minimum'].x + kin_info['axis_maximum'].x) / 2
+    mid_y = (kin_info['axis_minimum'].y + kin_info['axis_maximum'].y) / 2
+    return mid_x, mid_y
+
+
+# Set the wanted acceleration values for the duration of a test and then restore the previous ones.
+# The square corner velocity is only changed (and restored) if a new value is given
+@contextmanager
+def velocity_limits_scope(
+    gcode, toolhead_state: ToolheadState, accel: float, square_corner_velocity: Optional[float] = None
+):
+    new_limits = f'ACCEL={accel}'
+    old_limits = f'ACCEL={toolhead_state.max_accel}'
+    if toolhead_state.minimum_cruise_ratio is not None:  # minimum_cruise_ratio found: Klipper >= v0.12.0-239
+        new_limits += ' MINIMUM_CRUISE_RATIO=0'
+        old_limits += f' MINIMUM_CRUISE_RATIO={toolhead_state.minimum_cruise_ratio}'
+    if square_corner_velocity is not None:
+        new_limits += f' SQUARE_CORNER_VELOCITY={square_corner_velocity}'
+        old_limits += f' SQUARE_CORNER_VELOCITY={toolhead_state.square_corner_velocity}'
+
+    gcode.run_script_from_command(f'SET_VELOCITY_LIMIT {new_limits}')
+    try:
+        yield
+    finally:
+        gcode.run_script_from_command(f'SET_VELOCITY_LIMIT {old_limits}')
+
+
+# Deactivate input shaper if it is active to get raw movements during a test
+# and then re-enable it at the end if it was active
+@contextmanager
+def disabled_input_shaper_scope(printer):
+    input_shaper = printer.lookup_object('input_shaper', None)
+    if input_shaper is not None:
+        input_shaper.disable_shaping()
+    try:
+        yield
+    finally:
+        if input_shaper is not None:
+            input_shaper.enable_shaping()
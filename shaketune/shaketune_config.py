@@ -8,6 +8,7 @@
 #              and file paths related to Shake&Tune operations.
 
 
+from functools import lru_cache
 from pathlib import Path
 
 from .helpers.console_output import ConsoleOutput
@@ -43,11 +44,10 @@ class ShakeTuneConfig:
         else:
             return self._result_folder / RESULTS_SUBFOLDERS[type]
 
-    def get_results_subfolders(self) -> Path:
-        subfolders = [self._result_folder / subfolder for subfolder in RESULTS_SUBFOLDERS.values()]
-        return subfolders
-
+    # The version can't change while Klipper is running, so the git repository is opened and
+    # queried only once and the result is then reused by all the next commands and graph creators
     @staticmethod
+    @lru_cache(maxsize=1)
     def get_git_version() -> str:
         try:
             from git import GitCommandError, Repo
@@ -8,6 +8,7 @@
 #              vibration analysis processes in separate system processes.
 
 
+import multiprocessing
 import os
 import threading
 import traceback
@@ -29,6 +30,12 @@ class ShakeTuneProcess:
     def get_graph_creator(self):
         return self.graph_creator
 
+    # When several graphs are generated in the same run (like one per axis), each of them
+    # should get the full timeout budget as they can end up being processed one after the other
+    def scale_timeout(self, nb_graphs: int) -> None:
+        if self._timeout is not None:
+            self._timeout *= max(1, nb_graphs)
+
     def run(self) -> None:
         # Start the target function in a new process (a thread is known to cause issues with Klipper and CANbus due to the GIL)
         self._process = Process(target=self._shaketune_process_wrapper, args=(self.graph_creator, self._timeout))
@@ -55,7 +62,7 @@ class ShakeTuneProcess:
             # Add 5 seconds to the timeout for safety. The goal is to avoid the Timer to finish before the
             # Shake&Tune process is done in case we call the wait_for_completion() function that uses Klipper's reactor.
             timeout += 5
-            timer = threading.Timer(timeout, self._handle_timeout)
+            timer = threading.Timer(timeout, self._handle_process_timeout, args=(graph_creator,))
             timer.start()
         try:
             self._shaketune_process(graph_creator)
@@ -67,6 +74,19 @@ class ShakeTuneProcess:
         ConsoleOutput.print('Timeout: Shake&Tune computation did not finish within the specified timeout!')
         os._exit(1)  # Forcefully exit the process
 
+    # Same as _handle_timeout() but from inside the Shake&Tune child process, where the raw data
+    # of the graphs being created is first saved as it would otherwise be lost with the process
+    def _handle_process_timeout(self, graph_creator) -> None:
+        # Stop the worker processes that may be processing the CSV files in parallel as they would
+        # otherwise be left orphaned and waiting forever for new tasks after this process is gone
+        for worker in multiprocessing.active_children():
+            worker.terminate()
+        try:
+            graph_creator.archive_pending_files()
+        except Exception as e:
+            ConsoleOutput.print(f'Error while saving the raw data of the graphs: {e}')
+        self._handle_timeout()
+
     def _shaketune_process(self, graph_creator) -> None:
         # Reducing Shake&Tune process priority by putting the scheduler into batch mode with low priority. This in order to avoid
         # slowing down the main Klipper process as this can lead to random "Timer too close" or "Move queue overflow" errors
@@ -77,9 +97,8 @@ class ShakeTuneProcess:
         except Exception:
             ConsoleOutput.print('Warning: failed reducing Shake&Tune process priority, continuing...')
 
-        # Ensure the output folders exist
-        for folder in self._config.get_results_subfolders():
-            folder.mkdir(parents=True, exist_ok=True)
+        # Ensure the output folder of the current graph type exists (the other ones are not needed here)
+        self._config.get_results_folder(graph_creator.get_type()).mkdir(parents=True, exist_ok=True)
 
         # Generate the graphs
         try:
@@ -93,6 +112,9 @@ class ShakeTuneProcess:
         except Exception as e:
             ConsoleOutput.print(f'Error while generating the graphs: {e}\n{traceback.print_exc()}')
             return
+        finally:
+            # Keep the raw data of the graphs that could not be created (nothing is left after a success)
+            graph_creator.archive_pending_files()
 
         graph_creator.clean_old_files(self._config.keep_n_results)
 